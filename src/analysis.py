@@ -1,35 +1,78 @@
 import os
 import json
 import openai
+import pandas as pd
 from dotenv import load_dotenv
 
+from metrics import MONTH_COL
+
 # 1) Carrega sua API key
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# 2) Monta o prompt a partir do dicionário de métricas
-def build_prompt(all_metrics: dict) -> str:
-    # Serializa só as métricas que interessam (exemplo: pontualidade e atraso médio)
+# 2) Monta o prompt a partir das métricas mensais (saída 'raw' de calculate_monthly_metrics)
+def _round(val):
+    return None if pd.isna(val) else round(float(val), 2)
+
+def build_prompt(monthly: pd.DataFrame, by_sector: pd.DataFrame = None, by_employee: pd.DataFrame = None) -> str:
+    # Serializa só as métricas que interessam, com o delta contra a média dos meses anteriores
     data = {
-        month: {
-            "pontualidade": vals["Pontualidade Geral"],
-            "atraso_medio": vals["Atraso Médio na Entrada"],
-            "horas_extras": vals["Horas Extras Totais"]
+        str(row[MONTH_COL]): {
+            "pontualidade": _round(row["Pontualidade"]),
+            "atraso_medio": _round(row["Atraso Médio na Entrada"]),
+            "horas_extras": _round(row["Horas Extras"]),
+            "faltas_justificadas": _round(row["Faltas Justificadas"]),
+            "delta_pontualidade": _round(row["Δ Pontualidade"]),
+            "delta_atraso_medio": _round(row["Δ Atraso Médio na Entrada"])
         }
-        for month, vals in all_metrics.items()
+        for _, row in monthly.iterrows()
     }
+    last_month = monthly[MONTH_COL].iloc[-1]
+
+    extra = ""
+    if by_sector is not None:
+        latest = by_sector[by_sector[MONTH_COL] == last_month]
+        sectors = {
+            row["Setor"]: {
+                "pontualidade": _round(row["Pontualidade"]),
+                "delta_pontualidade": _round(row["Δ Pontualidade"])
+            }
+            for _, row in latest.iterrows()
+        }
+        extra += f"Pontualidade por setor no último mês:\n{json.dumps(sectors, indent=2, ensure_ascii=False)}\n\n"
+    if by_employee is not None:
+        latest = by_employee[by_employee[MONTH_COL] == last_month]
+        worst = latest.nsmallest(3, "Δ Pontualidade")
+        employees = {row["Nome_Funcionario"]: _round(row["Δ Pontualidade"]) for _, row in worst.iterrows()}
+        extra += f"Maiores quedas de pontualidade por colaborador (p.p.):\n{json.dumps(employees, indent=2, ensure_ascii=False)}\n\n"
 
     return (
-        "Você é um analista de RH. Compare estes indicadores mensais de pontualidade:\n\n"
+        "Você é um analista de RH. Compare estes indicadores mensais de pontualidade "
+        "(deltas em relação à média dos meses anteriores):\n\n"
         f"{json.dumps(data, indent=2)}\n\n"
+        f"{extra}"
         "Faça um parágrafo curto destacando se Maio 2025 melhorou ou piorou "
         "em relação à média de Fevereiro–Abril 2025."
         "Forneça o parágrafo de resposta entre aspas duplas, estritamente."
     )
 
 # 3) Envia à API e retorna o texto gerado
-def summarize_trends(all_metrics: dict) -> str:
-    prompt = build_prompt(all_metrics)
+def summarize_trends(
+    monthly: pd.DataFrame,
+    by_sector: pd.DataFrame = None,
+    by_employee: pd.DataFrame = None,
+    cache_path: str = None,
+    cache_key: str = None
+) -> str:
+    # Reaproveita o resumo já gerado para a mesma cache_key (ex.: reenvio após falha).
+    # O cache guarda um único resumo, sobrescrito quando a chave muda.
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("key") == cache_key:
+            return cached["summary"]
+
+    prompt = build_prompt(monthly, by_sector, by_employee)
     resp = openai.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
@@ -46,4 +89,11 @@ def summarize_trends(all_metrics: dict) -> str:
     if clean.startswith('"') and clean.endswith('"'):
         clean = clean[1:-1]
 
+    if cache_path:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": cache_key, "summary": clean}, f, ensure_ascii=False)
+
     return clean
\ No newline at end of file
@@ -1,9 +1,9 @@
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mtick
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
 
-def plot_punctuality_by_sector(df_sector, output_path="output/comparacao_setores.png"):
-    # Extrair dados
-    setores = df_sector['Setor'].tolist()
+def _punctuality_values(df_sector):
     # Detecta formato de valores: string com '%' ou numérico
     raw_vals = df_sector.get('Pontualidade_%', df_sector.get('Pontualidade'))
     pontualidades = []
@@ -12,70 +12,79 @@ def plot_punctuality_by_sector(df_sector, output_path="output/comparacao_setores
             pontualidades.append(float(v.strip('%')))
         else:
             pontualidades.append(float(v))
+    return pontualidades
 
-    # Criar figura e eixo com tamanho maior para legibilidade
-    fig, ax = plt.subplots(figsize=(8, 5))
-    positions = range(len(setores))
-    bars = ax.bar(positions, pontualidades, tick_label=setores)
+def _absence_counts(df):
+    # Filtrar apenas registros de falta
+    faltas = df[df['Tipo_Dia'].str.lower() == 'falta']
+    # Contar justificadas vs não justificadas
+    justificadas = int(faltas['Justificativa'].notna().sum())
+    nao_just = int(faltas['Justificativa'].isna().sum())
+    return justificadas, nao_just
 
-    # Formatar eixos
-    ax.set_title('Pontualidade Média por Setor', fontsize=14)
-    ax.set_xlabel('Setor', fontsize=12)
-    ax.set_ylabel('Pontualidade (%)', fontsize=12)
-    ax.set_ylim(0, max(pontualidades) * 1.1)
-    # Exibe ticks do eixo Y como percentuais
-    ax.yaxis.set_major_formatter(mtick.FormatStrFormatter('%.0f%%'))
+def punctuality_by_sector_drawing(df_sector, width=400, height=250) -> Drawing:
+    # Gráfico de barras vetorial, embutido direto no PDF
+    setores = [str(s) for s in df_sector['Setor'].tolist()]
+    pontualidades = _punctuality_values(df_sector)
 
-    # Rotaciona e ajusta fonte das labels do eixo X
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right', fontsize=10)
-    ax.tick_params(axis='y', labelsize=10)
-    plt.tight_layout()
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height - 14, 'Pontualidade Média por Setor',
+                       fontName='Helvetica', fontSize=12, textAnchor='middle'))
 
-    # Anotar valores no topo de cada barra
-    for bar, val in zip(bars, pontualidades):
-        ax.annotate(f'{val:.1f}%',
-                    xy=(bar.get_x() + bar.get_width() / 2, val),
-                    xytext=(0, 3),  # desloca 3 pontos acima da barra
-                    textcoords='offset points',
-                    ha='center', va='bottom', fontsize=8)
+    chart = VerticalBarChart()
+    chart.x = 45
+    chart.y = 60
+    chart.width = width - 60
+    chart.height = height - 90
+    chart.data = [pontualidades]
+    chart.bars[0].fillColor = colors.HexColor('#1f77b4')
+    chart.bars[0].strokeColor = None
 
-    # Salvar ou mostrar
-    if output_path:
-        plt.savefig(output_path, dpi=300)
-        plt.close(fig)
-    else:
-        plt.show()
+    chart.categoryAxis.categoryNames = setores
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontSize = 7
 
-def plot_absence_justification_pie(df, output_path="output/proporcao_faltas.png"):
-    # Filtrar apenas registros de falta
-    faltas = df[df['Tipo_Dia'].str.lower() == 'falta']
-    # Contar justificadas vs não justificadas
-    justificadas = faltas['Justificativa'].notna().sum()
-    nao_just = faltas['Justificativa'].isna().sum()
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = max(pontualidades) * 1.1 if pontualidades else 100
+    chart.valueAxis.labelTextFormat = '%.0f%%'
+    chart.valueAxis.labels.fontSize = 7
 
-    labels = ['Justificadas', 'Não Justificadas']
-    sizes = [justificadas, nao_just]
+    # Anotar valores no topo de cada barra
+    chart.barLabelFormat = '%.1f%%'
+    chart.barLabels.nudge = 6
+    chart.barLabels.fontSize = 6
 
-    # Criar pizza
-    fig, ax = plt.subplots(figsize=(6, 6))
-    wedges, texts, autotexts = ax.pie(
-        sizes,
-        labels=labels,
-        autopct='%.1f%%',
-        startangle=90
-    )
+    drawing.add(chart)
+    return drawing
+
+def absence_justification_pie_drawing(df, width=300, height=300) -> Drawing:
+    # Gráfico de pizza vetorial, embutido direto no PDF
+    justificadas, nao_just = _absence_counts(df)
+    sizes = [justificadas, nao_just]
+    total = sum(sizes)
 
-    # Estilizar textos
-    for text in texts + autotexts:
-        text.set_fontsize(10)
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height - 14, 'Proporção de Faltas Justificadas',
+                       fontName='Helvetica', fontSize=12, textAnchor='middle'))
 
-    ax.set_title('Proporção de Faltas Justificadas', fontsize=14)
-    ax.axis('equal')  # garante que o círculo fique redondo
-    plt.tight_layout()
+    pie = Pie()
+    size = min(width, height) - 100
+    pie.x = (width - size) / 2
+    pie.y = (height - size) / 2 - 10
+    pie.width = size
+    pie.height = size
+    pie.data = sizes if total else [1, 0]
+    pie.labels = [
+        f"{label} ({(n / total * 100) if total else 0:.1f}%)"
+        for label, n in zip(['Justificadas', 'Não Justificadas'], sizes)
+    ]
+    pie.startAngle = 90
+    pie.direction = 'anticlockwise'
+    pie.slices.fontSize = 8
+    pie.slices.strokeColor = colors.white
+    pie.slices[0].fillColor = colors.HexColor('#1f77b4')
+    pie.slices[1].fillColor = colors.HexColor('#ff7f0e')
 
-    # Salvar ou mostrar
-    if output_path:
-        plt.savefig(output_path, dpi=300)
-        plt.close(fig)
-    else:
-        plt.show()
\ No newline at end of file
+    drawing.add(pie)
+    return drawing
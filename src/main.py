@@ -1,24 +1,22 @@
 from pprint import pprint
 
-from metrics import load_data, calculate_overall_metrics, calculate_metrics_by_employee, calculate_metrics_by_sector, calculate_lunch_metrics, calculate_additional_indicators
-from report import generate_report
-from analysis import summarize_trends
-from charts import plot_punctuality_by_sector, plot_absence_justification_pie
+from metrics import MONTH_COL, load_months, calculate_monthly_metrics, pivot_monthly_metric, calculate_overall_metrics, calculate_metrics_by_employee, calculate_metrics_by_sector, calculate_lunch_metrics, calculate_additional_indicators
+from report import generate_report, report_fingerprint, was_sent, mark_sent
+from analysis import build_prompt, summarize_trends
+from charts import punctuality_by_sector_drawing, absence_justification_pie_drawing
 from email_sender import send_report
 
 def main():
     months = ["02", "03", "04", "05"]
-    all_metrics_raw = {}
-    dfs = {}
+    df_all = load_months({f"2025-{m}": f"data/{m}-2025.xlsx" for m in months})
 
-    for m in months:
-        path = f"data/{m}-2025.xlsx"
-        df = load_data(path)
-        dfs[m] = df
-        metrics = calculate_overall_metrics(df)
-        all_metrics_raw[f"2025-{m}"] = metrics['raw']
+    # Comparativos entre meses: um único groupby por nível de agregação
+    monthly = calculate_monthly_metrics(df_all)
+    monthly_sector = calculate_monthly_metrics(df_all, by='Setor')
+    monthly_emp = calculate_monthly_metrics(df_all, by=['ID_Funcionario', 'Nome_Funcionario'])
+    sector_matrix = pivot_monthly_metric(monthly_sector['raw'], 'Pontualidade', 'Setor').reset_index()
 
-    df_may = dfs["05"]
+    df_may = df_all[df_all[MONTH_COL] == "2025-05"]
     metrics_may = calculate_overall_metrics(df_may)
     overall_raw = metrics_may['raw']
     overall_fmt = metrics_may['formatted']
@@ -35,11 +33,26 @@ def main():
     add_metrics = calculate_additional_indicators(df_may)
     print("Métricas calculadas com sucesso.")
 
-    plot_punctuality_by_sector(sec_fmt)
-    plot_absence_justification_pie(df_may)
+    # Hash só dos dados de entrada, antes da chamada à IA: relatório já enviado não é refeito.
+    # O prompt entra no hash porque o resumo depende dele (inclusive dos dados por colaborador).
+    output_path = "output/relatorio.pdf"
+    prompt = build_prompt(monthly['raw'], monthly_sector['raw'], monthly_emp['raw'])
+    fingerprint = report_fingerprint(
+        "Maio 2025", overall_fmt, emp_fmt, sec_fmt, lunch_fmt, add_metrics,
+        df_may, monthly['formatted'], sector_matrix, prompt
+    )
+    if was_sent(output_path, fingerprint):
+        print("Relatório inalterado e já enviado; geração e envio ignorados.")
+        return
+
+    bar_chart = punctuality_by_sector_drawing(sec_fmt)
+    pie_chart = absence_justification_pie_drawing(df_may)
     print("Gráficos gerados com sucesso.")
 
-    summary = summarize_trends(all_metrics_raw)
+    summary = summarize_trends(
+        monthly['raw'], monthly_sector['raw'], monthly_emp['raw'],
+        cache_path="output/resumo.json", cache_key=fingerprint
+    )
     print("Resumo por IA gerado com sucesso.")
 
     generate_report(
@@ -50,13 +63,17 @@ def main():
         additional_metrics=add_metrics,
         df_data=df_may,
         report_month="Maio 2025",
-        bar_path="output/comparacao_setores.png",
-        pie_path="output/proporcao_faltas.png",
+        bar_chart=bar_chart,
+        pie_chart=pie_chart,
         summary_text=summary,
+        df_monthly=monthly['formatted'],
+        df_sector_monthly=sector_matrix,
+        output_path=output_path,
     )
     print("Relatório gerado com sucesso.")
 
-    send_report("output/relatorio.pdf", "Relatório de Pontualidade - Maio 2025", "Segue em anexo o Relatório de Pontualidade do mês de Maio de 2025.")
+    send_report(output_path, "Relatório de Pontualidade - Maio 2025", "Segue em anexo o Relatório de Pontualidade do mês de Maio de 2025.")
+    mark_sent(output_path, fingerprint)
     print("Relatório enviado por e-mail com sucesso.")
 
 if __name__ == '__main__':
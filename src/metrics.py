@@ -250,3 +250,88 @@ def calculate_additional_indicators(df: pd.DataFrame) -> dict:
     return {
         'Top 5 mais Atrasados': top5
     }
+
+MONTH_COL = 'Mes'
+
+def load_months(paths: dict) -> pd.DataFrame:
+    # Concatena as planilhas de vários meses com uma chave categórica de mês,
+    # ordenada na mesma ordem de `paths` ({rótulo do mês: caminho})
+    frames = [load_data(path).assign(**{MONTH_COL: month}) for month, path in paths.items()]
+    df = pd.concat(frames, ignore_index=True)
+    df[MONTH_COL] = pd.Categorical(df[MONTH_COL], categories=list(paths), ordered=True)
+    return df
+
+def calculate_monthly_metrics(df: pd.DataFrame, by=None) -> dict:
+    # Métricas mês × grupo (ex.: 'Setor' ou ['ID_Funcionario', 'Nome_Funcionario'])
+    # em um único groupby, com deltas contra a média dos meses anteriores
+    by = [] if by is None else ([by] if isinstance(by, str) else list(by))
+    keys = [MONTH_COL] + by
+
+    util = df['Tipo_Dia'] == 'Útil'
+    faltas = df['Tipo_Dia'] == 'Falta'
+    atrasos = (df['Hora_Entrada'] - ENTRY_TIME).clip(lower=pd.Timedelta(0)).dt.total_seconds() / 60
+    lunch_delays = (df['Hora_Entrada_Almoco'] - LUNCH_END_TIME).clip(lower=pd.Timedelta(0)).dt.total_seconds() / 60
+    overtime = (df['Hora_Saida'] - EXIT_TIME).clip(lower=pd.Timedelta(0)).dt.total_seconds() / 3600
+
+    flags = df[keys].assign(
+        util=util,
+        atrasado=util & (atrasos > 0),
+        atraso=atrasos.where(util),
+        atraso_almoco=lunch_delays.where(util),
+        horas_extras=overtime.where(util, 0),
+        falta=faltas,
+        falta_just=faltas & df['Justificativa'].notna(),
+    )
+    agg = flags.groupby(keys, observed=True, sort=True).agg(
+        n=('util', 'size'),
+        n_util=('util', 'sum'),
+        n_atrasado=('atrasado', 'sum'),
+        atraso=('atraso', 'mean'),
+        atraso_almoco=('atraso_almoco', 'mean'),
+        horas_extras=('horas_extras', 'sum'),
+        n_falta=('falta', 'sum'),
+        n_just=('falta_just', 'sum'),
+    )
+
+    raw = pd.DataFrame({
+        'Pontualidade': (1 - agg['n_atrasado'] / agg['n_util']) * 100,
+        'Atraso Médio na Entrada': agg['atraso'],
+        'Atraso Médio no Almoço': agg['atraso_almoco'],
+        'Horas Extras': agg['horas_extras'],
+        'Taxa de Faltas': agg['n_falta'] / agg['n'] * 100,
+        # Mesma definição de calculate_overall_metrics: % de faltas sem justificativa
+        'Taxa de Ausência': ((agg['n_falta'] - agg['n_just']) / agg['n_falta'] * 100).where(agg['n_falta'] > 0, 0),
+        'Faltas Justificadas': (agg['n_just'] / agg['n_falta'] * 100).where(agg['n_falta'] > 0, 0),
+    })
+    metric_cols = raw.columns.tolist()
+
+    # Delta de cada mês contra a média dos meses anteriores do mesmo grupo
+    history = raw.groupby(level=by, sort=False) if by else raw
+    prior_mean = history[metric_cols].transform(lambda s: s.expanding().mean().shift())
+    for col in metric_cols:
+        raw[f'Δ {col}'] = raw[col] - prior_mean[col]
+
+    raw = raw.reset_index()
+
+    units = {
+        'Pontualidade': '%',
+        'Atraso Médio na Entrada': ' min',
+        'Atraso Médio no Almoço': ' min',
+        'Horas Extras': 'h',
+        'Taxa de Faltas': '%',
+        'Taxa de Ausência': '%',
+        'Faltas Justificadas': '%',
+    }
+    fmt = raw[keys].copy()
+    fmt[MONTH_COL] = fmt[MONTH_COL].astype(str)
+    for col, unit in units.items():
+        fmt[col] = [
+            f"{val:.2f}{unit}" if pd.isna(delta) else f"{val:.2f}{unit} ({delta:+.2f})"
+            for val, delta in zip(raw[col], raw[f'Δ {col}'])
+        ]
+
+    return {'raw': raw, 'formatted': fmt}
+
+def pivot_monthly_metric(df_raw: pd.DataFrame, metric: str, by) -> pd.DataFrame:
+    # Matriz grupo × mês de uma métrica de `calculate_monthly_metrics`
+    return df_raw.pivot_table(index=by, columns=MONTH_COL, values=metric, observed=True)
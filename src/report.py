@@ -1,15 +1,60 @@
 import os
+import hashlib
+import json
 import pandas as pd
 from datetime import datetime
 
+from reportlab.graphics.shapes import Drawing
 from reportlab.lib.enums import TA_JUSTIFY
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, ListItem, ListFlowable, \
-    PageBreak, Image
+    PageBreak
 from reportlab.lib import colors
 from reportlab.pdfgen.canvas import Canvas
 
+from metrics import MONTH_COL
+
+# Estilos montados uma única vez por processo
+STYLES = getSampleStyleSheet()
+
+BULLET_PARA = ParagraphStyle(
+    'bullet_para',
+    parent=STYLES['Normal'],
+    spaceAfter=12,
+    leading=14
+)
+
+INDENTED = ParagraphStyle('Indented', parent=STYLES['Normal'], leftIndent=12)
+
+JUSTIFIED = ParagraphStyle(
+    'Justified',
+    parent=STYLES['Normal'],
+    alignment=TA_JUSTIFY,
+    firstLineIndent=20
+)
+
+CAPTION = ParagraphStyle('Caption', parent=STYLES['Normal'], fontName='Helvetica-Oblique', fontSize=8, leading=10)
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+])
+
+# Colunas da tabela 6.1. Com a coluna 'Atraso Médio no Almoço' a tabela passa de
+# ~520pt e não cabe nos ~450pt úteis do A4; colunas novas de calculate_monthly_metrics
+# só entram aqui se couberem na página. 'Taxa de Ausência' (e não 'Taxa de Faltas')
+# para usar a mesma definição da seção 1.
+MONTHLY_TABLE_COLUMNS = [
+    MONTH_COL,
+    'Pontualidade',
+    'Atraso Médio na Entrada',
+    'Horas Extras',
+    'Taxa de Ausência',
+    'Faltas Justificadas',
+]
+
 def draw_page_border(canvas: Canvas, doc):
     canvas.saveState()
     width, height = A4
@@ -18,6 +63,83 @@ def draw_page_border(canvas: Canvas, doc):
     canvas.rect(margin, margin, width - 2*margin, height - 2*margin)
     canvas.restoreState()
 
+def _bullet_list(texts) -> ListFlowable:
+    bullets = [
+        ListItem(
+            Paragraph(text, BULLET_PARA),
+            bulletText='•',
+            leftIndent=30,
+            spaceAfter=6
+        )
+        for text in texts
+    ]
+    return ListFlowable(bullets, bulletType='bullet')
+
+def _metrics_list(metrics: dict) -> ListFlowable:
+    return _bullet_list(
+        f"<b>{key.replace('_', ' ').capitalize()}</b>: {val}"
+        for key, val in metrics.items()
+    )
+
+def _table(df: pd.DataFrame, format_floats: bool = False) -> Table:
+    columns = df.columns.tolist()
+    data = [columns]
+    for row in df.itertuples(index=False):
+        if format_floats:
+            data.append([
+                ("-" if pd.isna(val) else f"{val:.2f}") if isinstance(val, float) else str(val)
+                for val in row
+            ])
+        else:
+            data.append(list(row))
+    table = Table(data, hAlign='LEFT')
+    table.setStyle(TABLE_STYLE)
+    return table
+
+def _centered(drawing: Drawing) -> Drawing:
+    drawing.hAlign = 'CENTER'
+    return drawing
+
+def _code_version() -> str:
+    # Hash do código que produz o relatório (layout, gráficos e prompt/modelo da IA):
+    # qualquer mudança nele invalida hashes antigos
+    h = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in ('report.py', 'charts.py', 'analysis.py'):
+        with open(os.path.join(src_dir, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+CODE_VERSION = _code_version()
+
+def report_fingerprint(*parts) -> str:
+    # Hash estável das entradas do relatório (dicts, textos e DataFrames) e do código
+    h = hashlib.sha256(CODE_VERSION.encode())
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            h.update(json.dumps(part.columns.astype(str).tolist()).encode())
+            h.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+def _sent_marker(output_path: str) -> str:
+    return f"{output_path}.sha256"
+
+def was_sent(output_path: str, fingerprint: str) -> bool:
+    # True se o relatório com este hash já foi gerado e enviado
+    marker = _sent_marker(output_path)
+    if not (os.path.exists(output_path) and os.path.exists(marker)):
+        return False
+    with open(marker) as f:
+        return f.read().strip() == fingerprint
+
+def mark_sent(output_path: str, fingerprint: str):
+    # Só deve ser chamado depois que o envio deu certo
+    with open(_sent_marker(output_path), 'w') as f:
+        f.write(fingerprint)
+
 def generate_report(
     overall_metrics: dict,
     df_emp: pd.DataFrame,
@@ -26,191 +148,96 @@ def generate_report(
     additional_metrics: dict,
     df_data: pd.DataFrame,
     report_month: str = "Maio 2025",
-    bar_path: str = None,
-    pie_path: str = None,
+    bar_chart: Drawing = None,
+    pie_chart: Drawing = None,
     summary_text: str = "",
-    output_path: str = "output/relatorio.pdf"
+    df_monthly: pd.DataFrame = None,
+    df_sector_monthly: pd.DataFrame = None,
+    output_path: str = "output/relatorio.pdf",
+    issue_date: datetime = None
 ):
+    # Os gráficos são Drawings vetoriais derivados de df_sector e df_data (ver charts.py);
+    # df_monthly e df_sector_monthly são as tabelas comparativas entre meses (ver
+    # calculate_monthly_metrics). Com as mesmas entradas e issue_date, o PDF sai idêntico.
+
     # Criar pasta se não existir
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    # Criar documento
+    # Criar documento (invariant=1 torna a saída byte a byte determinística)
     doc = SimpleDocTemplate(
-        output_path, pagesize=A4, title=f"Relatório de Pontualidade - {report_month}"
+        output_path, pagesize=A4, title=f"Relatório de Pontualidade - {report_month}", invariant=1
     )
-    styles = getSampleStyleSheet()
     elements = []
 
     # Título com mês
-    elements.append(Paragraph(f"Relatório de Pontualidade - {report_month}", styles['Title']))
+    elements.append(Paragraph(f"Relatório de Pontualidade - {report_month}", STYLES['Title']))
     elements.append(Spacer(1, 6))
 
     # Intervalo de dados
     start = df_data['Data'].min().strftime('%d/%m/%Y')
     end = df_data['Data'].max().strftime('%d/%m/%Y')
-    elements.append(Paragraph(f"Período de análise: {start} a {end}", styles['Normal']))
+    elements.append(Paragraph(f"Período de análise: {start} a {end}", STYLES['Normal']))
     elements.append(Spacer(1, 6))
     # Data de emissão
-    hoje = datetime.now().strftime('%d/%m/%Y')
-    elements.append(Paragraph(f"Data de emissão: {hoje}", styles['Normal']))
+    hoje = (issue_date or datetime.now()).strftime('%d/%m/%Y')
+    elements.append(Paragraph(f"Data de emissão: {hoje}", STYLES['Normal']))
     elements.append(Spacer(1, 12))
 
     # 1. Visão Geral
-    elements.append(Paragraph("1. Visão Geral", styles['Heading2']))
+    elements.append(Paragraph("1. Visão Geral", STYLES['Heading2']))
     elements.append(Spacer(1, 6))
-    bullet_para = ParagraphStyle(
-        'bullet_para',
-        parent=styles['Normal'],
-        spaceAfter=12,
-        leading=14
-    )
-    bullets = []
-    for key, val in overall_metrics.items():
-        label = key.replace('_', ' ').capitalize()
-        para = Paragraph(f"<b>{label}</b>: {val}", bullet_para)
-        bullets.append(
-            ListItem(
-                para,
-                bulletText='•',
-                leftIndent=30,
-                spaceAfter=6
-            )
-        )
-    elements.append(
-        ListFlowable(
-            bullets,
-            bulletType='bullet'
-        )
-    )
+    elements.append(_metrics_list(overall_metrics))
     elements.append(Spacer(1, 12))
 
     # 2. Métricas por Colaborador
-    elements.append(Paragraph("2. Métricas por Colaborador", styles['Heading2']))
+    elements.append(Paragraph("2. Métricas por Colaborador", STYLES['Heading2']))
     elements.append(Spacer(1, 6))
-    emp_columns = df_emp.columns.tolist()
-    emp_data = [emp_columns]
-    for _, row in df_emp.iterrows():
-        row_data = []
-        for col in emp_columns:
-            val = row[col]
-            if isinstance(val, float):
-                row_data.append(f"{val:.2f}")
-            else:
-                row_data.append(str(val))
-        emp_data.append(row_data)
-    table_emp = Table(emp_data, hAlign='LEFT')
-    table_emp.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-    ]))
-    elements.extend([table_emp, Spacer(1, 12)])
+    elements.extend([_table(df_emp, format_floats=True), Spacer(1, 12)])
 
     # 3. Métricas por Setor
-    elements.append(Paragraph("3. Métricas por Setor", styles['Heading2']))
-    elements.append(Paragraph("3.1 Métricas por Setor", styles['Heading3']))
+    elements.append(Paragraph("3. Métricas por Setor", STYLES['Heading2']))
+    elements.append(Paragraph("3.1 Métricas por Setor", STYLES['Heading3']))
     elements.append(Spacer(1, 6))
-    sec_columns = df_sector.columns.tolist()
-    sec_data = [sec_columns]
-    for _, row in df_sector.iterrows():
-        row_data = []
-        for col in sec_columns:
-            val = row[col]
-            row_data.append(val)
-        sec_data.append(row_data)
-    table_sec = Table(sec_data, hAlign='LEFT')
-    table_sec.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-    ]))
-    elements.extend([table_sec, Spacer(1, 12)])
-    if bar_path:
-        elements.append(Paragraph("3.2 Pontualidade por Setor", styles['Heading3']))
+    elements.extend([_table(df_sector), Spacer(1, 12)])
+    if bar_chart is not None:
+        elements.append(Paragraph("3.2 Pontualidade por Setor", STYLES['Heading3']))
         elements.append(Spacer(1, 6))
-        # ajusta o tamanho da imagem para caber na página
-        img = Image(bar_path, width=400, height=250)
-        img.hAlign = 'CENTER'
-        elements.extend([img, Spacer(1, 12)])
+        elements.extend([_centered(bar_chart), Spacer(1, 12)])
 
     # 4. Métricas de Intervalo de Almoço
-    elements.append(Paragraph("4. Métricas de Intervalo de Almoço", styles['Heading2']))
+    elements.append(Paragraph("4. Métricas de Intervalo de Almoço", STYLES['Heading2']))
     elements.append(Spacer(1, 6))
-    bullet_para = ParagraphStyle(
-        'bullet_para',
-        parent=styles['Normal'],
-        spaceAfter=12,
-        leading=14
-    )
-    bullets = []
-    for key, val in lunch_metrics.items():
-        label = key.replace('_', ' ').capitalize()
-        para = Paragraph(f"<b>{label}</b>: {val}", bullet_para)
-        bullets.append(
-            ListItem(
-                para,
-                bulletText='•',
-                leftIndent=30,
-                spaceAfter=6
-            )
-        )
-    elements.append(
-        ListFlowable(
-            bullets,
-            bulletType='bullet'
-        )
-    )
+    elements.append(_metrics_list(lunch_metrics))
     elements.append(Spacer(1, 12))
 
     # 5. Indicadores Adicionais
-    elements.append(Paragraph("5. Indicadores Adicionais", styles['Heading2']))
+    elements.append(Paragraph("5. Indicadores Adicionais", STYLES['Heading2']))
     elements.append(Spacer(1, 6))
-    elements.append(Paragraph("<b>Top 5 Funcionários Mais Atrasados:</b>", ParagraphStyle('Normal', parent=styles['Normal'], leftIndent=12)))
+    elements.append(Paragraph("<b>Top 5 Funcionários Mais Atrasados:</b>", INDENTED))
     elements.append(Spacer(1, 6))
-    bullet_para = ParagraphStyle(
-        'bullet_para',
-        parent=styles['Normal'],
-        spaceAfter=12,
-        leading=14
-    )
-    bullets = []
-    for nome in additional_metrics['Top 5 mais Atrasados']:
-        label = key.replace('_', ' ').capitalize()
-        para = Paragraph(f"{nome}", bullet_para)
-        bullets.append(
-            ListItem(
-                para,
-                bulletText='•',
-                leftIndent=30,
-                spaceAfter=6
-            )
-        )
-    elements.append(
-        ListFlowable(
-            bullets,
-            bulletType='bullet'
-        )
-    )
+    elements.append(_bullet_list(f"{nome}" for nome in additional_metrics['Top 5 mais Atrasados']))
     elements.append(PageBreak())
-    if pie_path:
-        elements.append(Paragraph("5.1 Proporção de Faltas Justificadas", styles['Heading3']))
+    if pie_chart is not None:
+        elements.append(Paragraph("5.1 Proporção de Faltas Justificadas", STYLES['Heading3']))
         elements.append(Spacer(1, 6))
-        img2 = Image(pie_path, width=300, height=300)
-        img2.hAlign = 'CENTER'
-        elements.extend([img2, Spacer(1, 12)])
+        elements.extend([_centered(pie_chart), Spacer(1, 12)])
 
     # 6. Análise Comparativa
-    elements.append(Paragraph("6. Análise Comparativa", styles['Heading2']))
+    elements.append(Paragraph("6. Análise Comparativa", STYLES['Heading2']))
     elements.append(Spacer(1, 6))
-
-    justified = ParagraphStyle(
-        'Justified',
-        parent=styles['Normal'],
-        alignment=TA_JUSTIFY,
-        firstLineIndent=20
-    )
-
-    elements.append(Paragraph(summary_text, justified))
+    if df_monthly is not None:
+        elements.append(Paragraph("6.1 Indicadores por Mês", STYLES['Heading3']))
+        elements.append(Paragraph(
+            "Entre parênteses: variação em relação à média dos meses anteriores (p.p. para percentuais).",
+            CAPTION
+        ))
+        elements.append(Spacer(1, 6))
+        elements.extend([_table(df_monthly[MONTHLY_TABLE_COLUMNS]), Spacer(1, 12)])
+    if df_sector_monthly is not None:
+        elements.append(Paragraph("6.2 Pontualidade por Setor e Mês (%)", STYLES['Heading3']))
+        elements.append(Spacer(1, 6))
+        elements.extend([_table(df_sector_monthly, format_floats=True), Spacer(1, 12)])
+    elements.append(Paragraph(summary_text, JUSTIFIED))
 
     # Gerar PDF com borda em todas as páginas
     doc.build(elements, onFirstPage=draw_page_border, onLaterPages=draw_page_border)